@@ -1,7 +1,11 @@
-from flask import Flask, render_template, send_from_directory, abort
+from flask import Flask, render_template, request, send_from_directory
 import os
 
 app = Flask(__name__)
+# Opt-in : X-Sendfile ne sert que derrière un frontal nginx/Apache qui
+# l'honore ; gunicorn et le serveur de dev l'ignorent et renverraient des
+# corps vides. Par défaut, Werkzeug passe par wsgi.file_wrapper → sendfile(2)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
 
 # ── Routes principales ─────────────────────────────────────
 @app.route("/")
@@ -32,22 +36,32 @@ def download_en():
 @app.route("/files/<path:filename>")
 def serve_file(filename):
     files_dir = os.path.join(app.root_path, "files")
-    if not os.path.exists(os.path.join(files_dir, filename)):
-        abort(404)
-    return send_from_directory(files_dir, filename, as_attachment=True)
+    # Sert une variante précompressée (.br / .gz, générée au déploiement)
+    # si le client l'accepte : zéro CPU de compression au moment de la requête
+    accept = request.headers.get("Accept-Encoding", "")
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in accept and os.path.exists(os.path.join(files_dir, filename + suffix)):
+            resp = send_from_directory(files_dir, filename + suffix,
+                                       as_attachment=True, conditional=True,
+                                       download_name=filename)
+            resp.headers["Content-Encoding"] = encoding
+            resp.headers["Vary"] = "Accept-Encoding"
+            return resp
+    # send_from_directory renvoie 404 lui-même si le fichier manque ;
+    # conditional=True active ETag + requêtes Range
+    resp = send_from_directory(files_dir, filename, as_attachment=True, conditional=True)
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
 
 # ── SEO ────────────────────────────────────────────────────
-@app.route("/robots.txt")
-def robots():
-    return send_from_directory(".", "robots.txt")
+# Petits fichiers statiques : max_age=86400 laisse navigateurs et CDN les cacher
+def _seo_file(name):
+    return lambda: send_from_directory(app.root_path, name, max_age=86400)
 
-@app.route("/sitemap.xml")
-def sitemap():
-    return send_from_directory(".", "sitemap.xml")
-
-@app.route("/googlea128813747473c36.html")
-def google():
-    return send_from_directory(".", "googlea128813747473c36.html")
+app.add_url_rule("/robots.txt", "robots_txt", _seo_file("robots.txt"))
+app.add_url_rule("/sitemap.xml", "sitemap_xml", _seo_file("sitemap.xml"))
+app.add_url_rule("/googlea128813747473c36.html", "google_verify",
+                 _seo_file("googlea128813747473c36.html"))
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -6,49 +6,96 @@ Utilise AES-256-GCM (authentifié) via la bibliothèque cryptography
 import os
 import base64
 import hashlib
+import functools
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+
+@functools.lru_cache(maxsize=32)
+def _derive_key_cached(password: bytes, salt: bytes) -> bytes:
+    """PBKDF2-HMAC-SHA256 (mise en cache : la KDF n'est payée qu'une fois par session)"""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32,
+                     salt=salt, iterations=200_000)
+    return kdf.derive(password)
 
 
 class JDATCrypto:
-    """Chiffrement AES-256-GCM par bloc, dérivation de clé via SHA-256"""
+    """Chiffrement AES-256-GCM par bloc, dérivation de clé via PBKDF2-HMAC-SHA256"""
 
     NONCE_SIZE = 12   # 96 bits pour GCM
     SALT_SIZE  = 16   # sel pour renforcer le mot de passe
+    VERSION    = 2    # octet de version préfixé aux données (v1 = ancien format sans préfixe)
+    AEAD_CACHE_MAX = 32
+
+    def __init__(self):
+        # Réutilise l'objet AESGCM par clé dérivée : évite de refaire
+        # le key schedule AES à chaque appel sur la même clé
+        self._aead_cache: dict[bytes, AESGCM] = {}
+
+    def _get_aead(self, key: bytes) -> AESGCM:
+        aesgcm = self._aead_cache.get(key)
+        if aesgcm is None:
+            if len(self._aead_cache) >= self.AEAD_CACHE_MAX:
+                self._aead_cache.pop(next(iter(self._aead_cache)))  # éviction FIFO
+            aesgcm = self._aead_cache[key] = AESGCM(key)
+        return aesgcm
 
     def _derive_key(self, password: str, salt: bytes) -> bytes:
-        """Dérive une clé AES-256 depuis un mot de passe + sel"""
+        """Dérive une clé AES-256 depuis un mot de passe + sel (format v2)"""
+        return _derive_key_cached(password.encode('utf-8'), salt)
+
+    def _derive_key_legacy(self, password: str, salt: bytes) -> bytes:
+        """Ancienne dérivation SHA-256 simple (fichiers au format v1)"""
         key_material = password.encode('utf-8') + salt
         return hashlib.sha256(key_material).digest()  # 32 bytes = 256 bits
 
     def encrypt(self, plaintext: str, password: str) -> str:
         """
         Chiffre un texte avec AES-256-GCM.
-        Retourne une chaîne base64 : salt(16) + nonce(12) + ciphertext
+        Retourne une chaîne base64 : version(1) + salt(16) + nonce(12) + ciphertext
         """
-        salt  = os.urandom(self.SALT_SIZE)
-        nonce = os.urandom(self.NONCE_SIZE)
+        rnd   = os.urandom(self.SALT_SIZE + self.NONCE_SIZE)  # un seul tirage kernel
+        salt  = rnd[:self.SALT_SIZE]
+        nonce = rnd[self.SALT_SIZE:]
         key   = self._derive_key(password, salt)
 
-        aesgcm = AESGCM(key)
+        aesgcm = self._get_aead(key)
         ct     = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), None)
 
-        raw    = salt + nonce + ct
+        raw    = bytes([self.VERSION]) + salt + nonce + ct
         return base64.b64encode(raw).decode('ascii')
 
     def decrypt(self, ciphertext_b64: str, password: str) -> str:
         """
         Déchiffre un texte AES-256-GCM depuis base64.
+        Accepte les deux formats : v2 (PBKDF2) et v1 (ancien, sans octet de version).
         Lève une exception si le mot de passe est incorrect.
         """
         try:
-            raw   = base64.b64decode(ciphertext_b64.strip())
-            salt  = raw[:self.SALT_SIZE]
-            nonce = raw[self.SALT_SIZE:self.SALT_SIZE + self.NONCE_SIZE]
-            ct    = raw[self.SALT_SIZE + self.NONCE_SIZE:]
-
-            key    = self._derive_key(password, salt)
-            aesgcm = AESGCM(key)
-            pt     = aesgcm.decrypt(nonce, ct, None)
-            return pt.decode('utf-8')
-        except Exception:
+            # validate=False ignore les blancs résiduels, pas besoin de strip()
+            raw = base64.b64decode(ciphertext_b64, validate=False)
+            if raw[:1] == bytes([self.VERSION]):
+                try:
+                    return self._decrypt_raw(raw[1:], password, legacy=False)
+                except InvalidTag:
+                    # Rarissime : fichier v1 dont le sel commence par l'octet de version
+                    return self._decrypt_raw(raw, password, legacy=True)
+            return self._decrypt_raw(raw, password, legacy=True)
+        except (ValueError, InvalidTag):
             raise ValueError("❌ Mot de passe incorrect ou données corrompues")
+
+    def _decrypt_raw(self, raw: bytes, password: str, legacy: bool) -> str:
+        """Déchiffre salt(16) + nonce(12) + ciphertext avec la KDF du format"""
+        salt  = raw[:self.SALT_SIZE]
+        nonce = raw[self.SALT_SIZE:self.SALT_SIZE + self.NONCE_SIZE]
+        ct    = raw[self.SALT_SIZE + self.NONCE_SIZE:]
+
+        if legacy:
+            key = self._derive_key_legacy(password, salt)
+        else:
+            key = self._derive_key(password, salt)
+        aesgcm = self._get_aead(key)
+        pt     = aesgcm.decrypt(nonce, ct, None)
+        return pt.decode('utf-8')
@@ -3,10 +3,63 @@ JDAT - Module Python pour lire/écrire des fichiers .jdat
 Format de données structurées avec chiffrement par bloc (AES-256)
 """
 
+import io
 import re
 import json
+import mmap
 from pathlib import Path
-from crypto import JDATCrypto
+
+try:
+    from numba import njit  # accélère le parsing des très gros blocs type 1
+except ImportError:
+    njit = None
+
+# Motifs précompilés une seule fois (évite re.compile à chaque load)
+# En-tête de bloc seulement : le contenu est délimité par .find(b'})'),
+# ce qui évite le backtracking d'un (.*?) paresseux sur tout le fichier.
+# Motif bytes : le parsing travaille directement sur le fichier mmap-é
+# et ne décode en str que les groupes capturés
+_HEADER_RE = re.compile(rb'\(n:(\S+)\s+l:(\S+)\s+t:(\d+)\s*(encrypted)?\s*\{')
+# Lignes "clé: valeur" des blocs type 1, extraites en un seul balayage
+_KV_RE = re.compile(r'^[ \t]*([^:\s][^:\n]*?)[ \t]*:[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+# Au-delà de cette taille de contenu, le scanner Numba (si dispo) prend le relais
+_KV_NUMBA_THRESHOLD = 16_384
+
+
+def _scan_kv_offsets(buf):
+    """Balaye les lignes 'clé: valeur' octet par octet ; renvoie les offsets
+    (début/fin de clé, début/fin de valeur). Compilable par Numba."""
+    spans = []
+    n = len(buf)
+    i = 0
+    while i < n:
+        j = i
+        while j < n and buf[j] != 10:          # fin de ligne (\n)
+            j += 1
+        ks = i
+        while ks < j and (buf[ks] == 32 or buf[ks] == 9):
+            ks += 1
+        c = ks
+        while c < j and buf[c] != 58:          # premier ':'
+            c += 1
+        if ks < c < j:
+            ke = c
+            while ke > ks and (buf[ke - 1] == 32 or buf[ke - 1] == 9):
+                ke -= 1
+            vs = c + 1
+            while vs < j and (buf[vs] == 32 or buf[vs] == 9):
+                vs += 1
+            ve = j
+            while ve > vs and (buf[ve - 1] == 32 or buf[ve - 1] == 9 or buf[ve - 1] == 13):
+                ve -= 1
+            spans.append((ks, ke, vs, ve))
+        i = j + 1
+    return spans
+
+
+if njit is not None:
+    _scan_kv_offsets = njit(cache=True)(_scan_kv_offsets)
 
 
 class JDATBlock:
@@ -14,9 +67,19 @@ class JDATBlock:
         self.name = name
         self.link = link
         self.type = btype          # 1 = données structurées, 2 = texte/code brut
-        self.content = content     # contenu brut (déchiffré ou non)
+        self._content = content    # contenu brut (déchiffré ou non)
         self.encrypted = encrypted
         self._data = None          # cache parsé pour type 1
+        self._serialized = None    # cache de to_jdat(), invalidé à chaque mutation
+
+    @property
+    def content(self) -> str:
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._serialized = None
 
     def parse_data(self) -> dict:
         """Parse le contenu type 1 en dict clé:valeur"""
@@ -24,16 +87,14 @@ class JDATBlock:
             return {}
         if self._data is not None:
             return self._data
-        data = {}
-        for line in self.content.strip().splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            if ':' in line:
-                key, _, value = line.partition(':')
-                data[key.strip()] = value.strip()
-        self._data = data
-        return data
+        content = self.content
+        if njit is not None and len(content) > _KV_NUMBA_THRESHOLD:
+            buf = content.encode('utf-8')
+            self._data = {buf[ks:ke].decode('utf-8'): buf[vs:ve].decode('utf-8')
+                          for ks, ke, vs, ve in _scan_kv_offsets(buf)}
+        else:
+            self._data = {m.group(1): m.group(2) for m in _KV_RE.finditer(content)}
+        return self._data
 
     def get(self, key: str, default=None):
         """Accès rapide à une clé (type 1 uniquement)"""
@@ -44,27 +105,28 @@ class JDATBlock:
         d = self.parse_data()
         d[key] = value
         self._data = d
+        self._serialized = None
         self._rebuild_content()
 
     def _rebuild_content(self):
         """Reconstruit le contenu brut depuis _data"""
         if self.type == 1 and self._data is not None:
-            lines = [f"  {k}: {v}" for k, v in self._data.items()]
-            self.content = "\n".join(lines)
+            self.content = "\n".join(f"  {k}: {v}" for k, v in self._data.items())
 
     def to_jdat(self) -> str:
-        """Sérialise le bloc en texte JDAT"""
+        """Sérialise le bloc en texte JDAT (mémoïsé tant que le bloc ne change pas)"""
+        if self._serialized is not None:
+            return self._serialized
         if self.encrypted:
             header = f"(n:{self.name} l:{self.link} t:{self.type} encrypted{{"
-            return f"{header}\n{self.content}\n}})"
-        else:
-            if self.type == 1:
+        elif self.type == 1:
+            if self._data is not None:
                 self._rebuild_content()
-                header = f"(n:{self.name} l:{self.link} t:{self.type} {{"
-                return f"{header}\n{self.content}\n}})"
-            else:
-                header = f"(n:{self.name} l:{self.link} t:{self.type}{{"
-                return f"{header}\n{self.content}\n}})"
+            header = f"(n:{self.name} l:{self.link} t:{self.type} {{"
+        else:
+            header = f"(n:{self.name} l:{self.link} t:{self.type}{{"
+        self._serialized = f"{header}\n{self.content}\n}})"
+        return self._serialized
 
     def __repr__(self):
         status = "🔒" if self.encrypted else "🔓"
@@ -74,9 +136,22 @@ class JDATBlock:
 class JDATFile:
     def __init__(self, path: str = None):
         self.path = Path(path) if path else None
-        self.blocks: list[JDATBlock] = []
         self.comments: list[str] = []
-        self.crypto = JDATCrypto()
+        # _by_link est le conteneur canonique : l'ordre d'insertion des dicts
+        # préserve l'ordre de sérialisation, et la suppression devient O(1)
+        self._by_link: dict[str, JDATBlock] = {}
+        self._by_name: dict[str, JDATBlock] = {}
+        self.crypto = None  # instancié à la demande : l'import de cryptography est coûteux
+
+    def _get_crypto(self):
+        if self.crypto is None:
+            from crypto import JDATCrypto
+            self.crypto = JDATCrypto()
+        return self.crypto
+
+    @property
+    def blocks(self) -> list[JDATBlock]:
+        return list(self._by_link.values())
 
     # ─────────────────────────────────────────
     # PARSING
@@ -88,48 +163,69 @@ class JDATFile:
             self.path = Path(path)
         if not self.path or not self.path.exists():
             raise FileNotFoundError(f"Fichier introuvable : {self.path}")
-        text = self.path.read_text(encoding='utf-8')
-        self._parse(text)
+        # mmap évite de matérialiser bytes + str du fichier entier :
+        # seuls les groupes capturés sont décodés
+        with open(self.path, 'rb') as f:
+            if self.path.stat().st_size == 0:
+                self._parse_bytes(b'')
+            else:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    self._parse_bytes(mm)
+                finally:
+                    mm.close()
         return self
 
     def _parse(self, text: str):
-        """Parse le texte JDAT complet"""
-        self.blocks = []
+        """Parse le texte JDAT complet (variante str, voir _parse_bytes)"""
+        self._parse_bytes(text.encode('utf-8'))
+
+    def _parse_bytes(self, data):
+        """Parse le contenu JDAT complet depuis bytes ou mmap"""
         self.comments = []
+        self._by_link = {}
+        self._by_name = {}
 
-        # Commentaires : ({<...>})
-        comment_pattern = re.compile(r'\(\{<(.*?)>\}\)', re.DOTALL)
-        for m in comment_pattern.finditer(text):
-            self.comments.append(m.group(1).strip())
+        # Commentaires : ({<...>}) — simple balayage .find, sans regex
+        i = 0
+        while True:
+            s = data.find(b'({<', i)
+            if s < 0:
+                break
+            e = data.find(b'>})', s + 3)
+            if e < 0:
+                break
+            self.comments.append(data[s + 3:e].decode('utf-8').strip())
+            i = e + 3
 
         # Blocs : (n:... l:... t:N [encrypted]{ ... })
-        block_pattern = re.compile(
-            r'\(n:(\S+)\s+l:(\S+)\s+t:(\d+)\s*(encrypted)?\s*\{(.*?)\}\)',
-            re.DOTALL
-        )
-        for m in block_pattern.finditer(text):
-            name    = m.group(1)
-            link    = m.group(2)
+        for m in _HEADER_RE.finditer(data):
+            start = m.end()
+            end   = data.find(b'})', start)
+            if end < 0:
+                continue  # bloc non fermé : ignoré, comme avant
+            name    = m.group(1).decode('utf-8')
+            link    = m.group(2).decode('utf-8')
             btype   = int(m.group(3))
-            enc     = m.group(4) == 'encrypted' if m.group(4) else False
-            content = m.group(5)
-            self.blocks.append(JDATBlock(name, link, btype, content, enc))
+            enc     = m.group(4) == b'encrypted'
+            content = data[start:end].decode('utf-8')
+            if enc:
+                content = content.strip()  # base64 propre dès le chargement
+            block = JDATBlock(name, link, btype, content, enc)
+            # setdefault : en cas de lien ou nom dupliqué, la première
+            # occurrence gagne, comme le parcours linéaire d'origine
+            self._by_link.setdefault(block.link, block)
+            self._by_name.setdefault(block.name, block)
 
     # ─────────────────────────────────────────
     # ACCÈS
     # ─────────────────────────────────────────
 
     def get_by_link(self, link: str) -> JDATBlock | None:
-        for b in self.blocks:
-            if b.link == link:
-                return b
-        return None
+        return self._by_link.get(link)
 
     def get_by_name(self, name: str) -> JDATBlock | None:
-        for b in self.blocks:
-            if b.name == name:
-                return b
-        return None
+        return self._by_name.get(name)
 
     def list_blocks(self) -> list[dict]:
         return [{"name": b.name, "link": b.link, "type": b.type, "encrypted": b.encrypted}
@@ -141,17 +237,27 @@ class JDATFile:
 
     def add_block(self, name: str, link: str, btype: int, content: str):
         """Ajoute un nouveau bloc"""
-        if self.get_by_link(link):
+        if link in self._by_link:
             raise ValueError(f"Un bloc avec le lien '{link}' existe déjà")
-        self.blocks.append(JDATBlock(name, link, btype, content))
+        block = JDATBlock(name, link, btype, content)
+        self._by_link[link] = block
+        # plusieurs blocs peuvent partager un nom : le premier reste prioritaire
+        self._by_name.setdefault(name, block)
 
     def remove_block(self, link: str) -> bool:
         """Supprime un bloc par son lien"""
-        for i, b in enumerate(self.blocks):
-            if b.link == link:
-                del self.blocks[i]
-                return True
-        return False
+        block = self._by_link.pop(link, None)
+        if block is None:
+            return False
+        if self._by_name.get(block.name) is block:
+            # Repointe vers un autre bloc du même nom s'il en reste un
+            for other in self._by_link.values():
+                if other.name == block.name:
+                    self._by_name[block.name] = other
+                    break
+            else:
+                del self._by_name[block.name]
+        return True
 
     # ─────────────────────────────────────────
     # CHIFFREMENT PAR BLOC
@@ -164,9 +270,10 @@ class JDATFile:
             return False
         if block.encrypted:
             raise ValueError("Bloc déjà chiffré")
-        if block.type == 1:
+        if block.type == 1 and block._data is not None:
+            # _data absent = jamais modifié : le contenu chargé fait déjà foi
             block._rebuild_content()
-        block.content = self.crypto.encrypt(block.content, password)
+        block.content = self._get_crypto().encrypt(block.content, password)
         block.encrypted = True
         return True
 
@@ -177,7 +284,7 @@ class JDATFile:
             return False
         if not block.encrypted:
             raise ValueError("Bloc non chiffré")
-        block.content = self.crypto.decrypt(block.content, password)
+        block.content = self._get_crypto().decrypt(block.content, password)
         block.encrypted = False
         block._data = None  # reset cache
         return True
@@ -196,10 +303,17 @@ class JDATFile:
 
     def to_jdat(self) -> str:
         """Sérialise tout le fichier en texte JDAT"""
-        parts = []
-        if self.comments:
-            for c in self.comments:
-                parts.append(f"({{<{c}>}})")
+        buf = io.StringIO()
+        first = True
+        for c in self.comments:
+            if not first:
+                buf.write("\n\n")
+            buf.write(f"({{<{c}>}})")
+            first = False
         for b in self.blocks:
-            parts.append(b.to_jdat())
-        return "\n\n".join(parts) + "\n"
+            if not first:
+                buf.write("\n\n")
+            buf.write(b.to_jdat())
+            first = False
+        buf.write("\n")
+        return buf.getvalue()
@@ -7,13 +7,21 @@ Commandes : open, new, save, list, read, find, add, edit, del,
 
 import sys
 import os
+import atexit
 import getpass
 from pathlib import Path
 
+try:
+    import readline  # historique + édition de ligne (pyreadline3 le fournit sous Windows)
+except ImportError:
+    readline = None
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from jdat import JDATFile, JDATBlock
 
+HISTORY_FILE = Path.home() / ".jdat_history"
+
 
 # ─────────────────────────────────────────────────────────────
 # Couleurs ANSI
@@ -82,23 +90,37 @@ HELP = f"""
     exit / quit / q          Quitte le shell
 """
 
+# Gabarits ANSI précomposés : évite de réassembler les codes couleur
+# à chaque ligne affichée (list/find sur de gros fichiers)
+_LIST_HEADER   = f"{C.BOLD}  {'NOM':<20} {'LIEN':<20} {'TYPE':<8} ÉTAT{C.RESET}"
+_LIST_SEP      = f"{C.GREY}  {'─'*60}{C.RESET}"
+_LIST_ROW      = (f"  {C.CYAN}{{name:<20}}{C.RESET} {C.YELLOW}{{link:<20}}{C.RESET} "
+                  f"{{t:<8}} {{etat}}")
+_ETAT_ENC      = f"{C.RED}🔒 chiffré{C.RESET}"
+_ETAT_CLEAR    = f"{C.GREEN}🔓 clair{C.RESET}"
+_BLOCK_SEP_MID = f"{C.CYAN}  ├{'─'*40}{C.RESET}"
+_BLOCK_SEP_END = f"{C.CYAN}  └{'─'*40}{C.RESET}"
+_BLOCK_ENC_MSG = f"{C.YELLOW}  │  [contenu chiffré — utilisez 'dec' pour lire]{C.RESET}"
+_BLOCK_PREFIX  = f"{C.CYAN}  │  {C.RESET}"
+
+
 def display_block(block: JDATBlock):
     status = color("🔒 CHIFFRÉ", C.RED, C.BOLD) if block.encrypted else color("🔓 clair", C.GREEN)
     ttype  = "données (t:1)" if block.type == 1 else "code/texte brut (t:2)"
     print()
     print(color(f"  ┌─ {block.name} ", C.CYAN, C.BOLD) + color(f"({ttype}) {status}", C.GREY))
     print(color(f"  │  lien : {block.link}", C.GREY))
-    print(color(f"  ├{'─'*40}", C.CYAN))
+    print(_BLOCK_SEP_MID)
     if block.encrypted:
-        print(color("  │  [contenu chiffré — utilisez 'dec' pour lire]", C.YELLOW))
+        print(_BLOCK_ENC_MSG)
     elif block.type == 1:
         data = block.parse_data()
         for k, v in data.items():
-            print(color("  │  ", C.CYAN) + color(f"{k}", C.BOLD) + color(f" : {v}", C.RESET))
+            print(f"{_BLOCK_PREFIX}{C.BOLD}{k}{C.RESET} : {v}{C.RESET}")
     else:
         for line in block.content.strip().splitlines():
-            print(color("  │  ", C.CYAN) + line)
-    print(color(f"  └{'─'*40}", C.CYAN))
+            print(_BLOCK_PREFIX + line)
+    print(_BLOCK_SEP_END)
     print()
 
 # ── Fichiers ──────────────────────────────────────────────────
@@ -181,12 +203,12 @@ def cmd_list(jf):
         print_info("Aucun bloc dans ce fichier")
         return
     print()
-    print(color(f"  {'NOM':<20} {'LIEN':<20} {'TYPE':<8} {'ÉTAT'}", C.BOLD))
-    print(color(f"  {'─'*60}", C.GREY))
+    print(_LIST_HEADER)
+    print(_LIST_SEP)
     for b in jf.blocks:
-        etat = color("🔒 chiffré", C.RED) if b.encrypted else color("🔓 clair", C.GREEN)
+        etat = _ETAT_ENC if b.encrypted else _ETAT_CLEAR
         t    = "données" if b.type == 1 else "code"
-        print(f"  {color(b.name, C.CYAN):<29} {color(b.link, C.YELLOW):<29} {t:<8} {etat}")
+        print(_LIST_ROW.format(name=b.name, link=b.link, t=t, etat=etat))
     print()
 
 def cmd_read(args, jf, current):
@@ -347,6 +369,35 @@ def cmd_dec(args, jf, current):
     except ValueError as e:
         print_err(str(e))
 
+# ─────────────────────────────────────────────────────────────
+# DISPATCH
+# ─────────────────────────────────────────────────────────────
+def _unchanged(_result, jf, current):
+    """Pour les commandes à effet de bord qui ne changent ni jf ni le bloc courant"""
+    return jf, current
+
+# Chaque entrée reçoit (args, jf, current) et renvoie le nouvel état (jf, current)
+DISPATCH = {
+    'help': lambda args, jf, cur: _unchanged(print(HELP), jf, cur),
+    'open': lambda args, jf, cur: (cmd_open(args, jf), None),
+    'new':  lambda args, jf, cur: (cmd_new(args, jf), None),
+    'save': lambda args, jf, cur: _unchanged(cmd_save(args, jf), jf, cur),
+    'goto': lambda args, jf, cur: (jf, cmd_goto(args, jf, cur)),
+    'back': lambda args, jf, cur: (jf, cmd_back(cur)),
+    'pwd':  lambda args, jf, cur: _unchanged(cmd_pwd(cur), jf, cur),
+    'list': lambda args, jf, cur: _unchanged(cmd_list(jf), jf, cur),
+    'read': lambda args, jf, cur: _unchanged(cmd_read(args, jf, cur), jf, cur),
+    'find': lambda args, jf, cur: _unchanged(cmd_find(args, jf), jf, cur),
+    'add':  lambda args, jf, cur: _unchanged(cmd_add(jf), jf, cur),
+    'edit': lambda args, jf, cur: _unchanged(cmd_edit(args, jf, cur), jf, cur),
+    'del':  lambda args, jf, cur: (jf, cmd_del(args, jf, cur)),
+    'enc':  lambda args, jf, cur: _unchanged(cmd_enc(args, jf, cur), jf, cur),
+    'dec':  lambda args, jf, cur: _unchanged(cmd_dec(args, jf, cur), jf, cur),
+}
+DISPATCH['cd'] = DISPATCH['goto']
+DISPATCH['..'] = DISPATCH['back']
+DISPATCH['ls'] = DISPATCH['list']
+
 # ─────────────────────────────────────────────────────────────
 # BOUCLE PRINCIPALE
 # ─────────────────────────────────────────────────────────────
@@ -355,12 +406,27 @@ def main():
     jf      = None
     current = None
 
+    if readline:
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+        atexit.register(readline.write_history_file, HISTORY_FILE)
+
     if len(sys.argv) > 1:
         jf = cmd_open([sys.argv[1]], jf)
 
+    # Le prompt n'est reconstruit que si le fichier ou le bloc courant change
+    prompt_state = None
+    prompt_str   = ""
+
     while True:
+        state = (id(jf), str(jf.path) if jf and jf.path else None, id(current))
+        if state != prompt_state:
+            prompt_str   = prompt(jf, current)
+            prompt_state = state
         try:
-            raw = input(prompt(jf, current)).strip()
+            raw = input(prompt_str).strip()
         except (KeyboardInterrupt, EOFError):
             print(color("\n  Au revoir !", C.CYAN))
             break
@@ -372,24 +438,15 @@ def main():
         cmd   = parts[0].lower()
         args  = parts[1:]
 
-        if   cmd in ('exit', 'quit', 'q'):   print(color("  Au revoir !", C.CYAN)); break
-        elif cmd == 'help':                   print(HELP)
-        elif cmd == 'open':                   jf = cmd_open(args, jf);  current = None
-        elif cmd == 'new':                    jf = cmd_new(args, jf);   current = None
-        elif cmd == 'save':                   cmd_save(args, jf)
-        elif cmd in ('goto', 'cd'):           current = cmd_goto(args, jf, current)
-        elif cmd in ('back', '..'):           current = cmd_back(current)
-        elif cmd == 'pwd':                    cmd_pwd(current)
-        elif cmd in ('list', 'ls'):           cmd_list(jf)
-        elif cmd == 'read':                   cmd_read(args, jf, current)
-        elif cmd == 'find':                   cmd_find(args, jf)
-        elif cmd == 'add':                    cmd_add(jf)
-        elif cmd == 'edit':                   cmd_edit(args, jf, current)
-        elif cmd == 'del':                    current = cmd_del(args, jf, current)
-        elif cmd == 'enc':                    cmd_enc(args, jf, current)
-        elif cmd == 'dec':                    cmd_dec(args, jf, current)
-        else:
+        if cmd in ('exit', 'quit', 'q'):
+            print(color("  Au revoir !", C.CYAN))
+            break
+
+        handler = DISPATCH.get(cmd)
+        if handler is None:
             print_err(f"Commande inconnue : '{cmd}' — tapez 'help'")
+        else:
+            jf, current = handler(args, jf, current)
 
 
 if __name__ == '__main__':